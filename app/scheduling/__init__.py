@@ -0,0 +1,23 @@
+"""Adaptive scrape scheduling.
+
+Kept free of the Playwright and Supabase dependencies so CI can decide which
+providers are due before installing them.
+"""
+
+from .scheduler import (
+    due_platforms,
+    expected_changes,
+    learn_change_rates,
+    replay_schedule,
+)
+from .state import load_attempts, load_history, record_attempts
+
+__all__ = [
+    "due_platforms",
+    "expected_changes",
+    "learn_change_rates",
+    "replay_schedule",
+    "load_attempts",
+    "load_history",
+    "record_attempts",
+]
@@ -0,0 +1,484 @@
+"""Adaptive scrape scheduling learned from stored rate history."""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable, Sequence
+
+from config import (
+    SCRAPE_BATCH_FRACTION,
+    SCRAPE_CHANGE_THRESHOLD,
+    SCRAPE_HISTORY_HALF_LIFE_DAYS,
+    SCRAPE_MAX_INTERVAL_MINUTES,
+    SCRAPE_MIN_INTERVAL_MINUTES,
+    SCRAPE_TICK_MINUTES,
+)
+
+# Pseudo-hours of the provider-wide rate mixed into every (weekday, hour)
+# bucket so sparsely observed buckets do not swing to 0 or to extremes.
+_PRIOR_WEIGHT_HOURS = 4.0
+# Below this much observed time a provider's learned rates are not trusted.
+# It is then scraped no more often than the old hourly cron: from an hour on
+# it rides along with other runs, and it forces a run of its own after two.
+_MIN_HISTORY_HOURS = 24.0
+_THIN_HISTORY_INTERVAL = timedelta(hours=1)
+_EM_ITERATIONS = 20
+
+Bucket = tuple[int, int]
+Observation = tuple[datetime, str]
+
+
+def parse_timestamp(value: Any) -> datetime | None:
+    """Parse a stored timestamp as naive Singapore time, or return None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    # Scraper timestamps are naive Singapore time; drop any offset so that
+    # comparisons and bucketing stay in the same clock.
+    return parsed.replace(tzinfo=None)
+
+
+def _bucket(moment: datetime) -> Bucket:
+    return moment.weekday(), moment.hour
+
+
+def _hourly_spans(since: datetime, until: datetime) -> Iterable[tuple[Bucket, float]]:
+    """Yield the (weekday, hour) buckets covered by ``[since, until)`` in hours."""
+    cursor = since
+    while cursor < until:
+        hour_end = cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        step_end = min(hour_end, until)
+        yield _bucket(cursor), (step_end - cursor).total_seconds() / 3600
+        cursor = step_end
+
+
+def _observations(history: Iterable[dict[str, Any]]) -> dict[str, list[Observation]]:
+    """Group history rows into time-ordered (timestamp, rate) pairs per platform."""
+    grouped: dict[str, list[Observation]] = defaultdict(list)
+    for row in history:
+        platform = row.get("platform")
+        moment = parse_timestamp(row.get("timestamp") or row.get("retrieved_at"))
+        rate = row.get("exchange_rate")
+        if not platform or moment is None or rate is None:
+            continue
+        grouped[platform].append((moment, str(rate)))
+    for observations in grouped.values():
+        observations.sort(key=lambda observation: observation[0])
+    return dict(grouped)
+
+
+def _attributable_gap(max_interval: timedelta) -> timedelta:
+    """Return the longest gap between readings that is not an outage.
+
+    The scheduler never leaves a provider unscraped for longer than
+    ``max_interval``, so gaps well beyond it are outages (disabled workflow,
+    broken selectors) that carry no usable timing.
+    """
+    return max_interval * 2
+
+
+def _learn(
+    observations: Sequence[Observation],
+    *,
+    max_gap: timedelta,
+    prior_weight_hours: float = _PRIOR_WEIGHT_HOURS,
+    half_life_days: float = SCRAPE_HISTORY_HALF_LIFE_DAYS,
+) -> dict[str, Any]:
+    """Estimate hourly change rates per (weekday, hour) bucket.
+
+    Changes are modelled as a Poisson process whose rate is constant within
+    each bucket. A gap between readings only reveals whether the rate moved,
+    not how often, so each gap is spread across every hour it covers and the
+    counts are recovered with expectation-maximisation instead of counting
+    one change per gap. Gaps are down-weighted exponentially by how much
+    observed time follows them, so the model follows providers that change
+    behaviour without an outage erasing everything learned before it. Gaps
+    longer than ``max_gap`` are outages and are left out.
+    """
+    gaps = [
+        (previous_at, current_at, previous_rate != current_rate)
+        for (previous_at, previous_rate), (current_at, current_rate) in zip(
+            observations, observations[1:]
+        )
+        if timedelta(0) < current_at - previous_at <= max_gap
+    ]
+
+    exposure: dict[Bucket, float] = defaultdict(float)
+    changed_gaps: list[tuple[float, dict[Bucket, float]]] = []
+    observed_hours = 0.0
+    for previous_at, current_at, changed in reversed(gaps):
+        age_days = observed_hours / 24
+        weight = 0.5 ** (age_days / half_life_days) if half_life_days > 0 else 1.0
+        spans: dict[Bucket, float] = defaultdict(float)
+        for bucket, hours in _hourly_spans(previous_at, current_at):
+            spans[bucket] += hours
+            exposure[bucket] += weight * hours
+            observed_hours += hours
+        if changed:
+            changed_gaps.append((weight, dict(spans)))
+
+    total_exposure = sum(exposure.values())
+    if not total_exposure:
+        return {"overall": None, "buckets": {}, "hours": 0.0}
+
+    overall = sum(weight for weight, _ in changed_gaps) / total_exposure
+    rates = {bucket: overall for bucket in exposure}
+    for _ in range(_EM_ITERATIONS):
+        if not overall:
+            break
+        counts: dict[Bucket, float] = defaultdict(float)
+        for weight, spans in changed_gaps:
+            intensity = {bucket: rates[bucket] * hours for bucket, hours in spans.items()}
+            expected = sum(intensity.values())
+            if expected <= 0:
+                continue
+            # Expected number of changes in a gap known to contain at least one.
+            total = expected / -math.expm1(-expected)
+            for bucket, share in intensity.items():
+                counts[bucket] += weight * total * share / expected
+        overall = sum(counts.values()) / total_exposure
+        rates = {
+            bucket: (counts[bucket] + overall * prior_weight_hours)
+            / (exposure[bucket] + prior_weight_hours)
+            for bucket in exposure
+        }
+
+    return {"overall": overall, "buckets": rates, "hours": observed_hours}
+
+
+def learn_change_rates(
+    history: Iterable[dict[str, Any]],
+    *,
+    max_interval: timedelta = timedelta(minutes=SCRAPE_MAX_INTERVAL_MINUTES),
+) -> dict[str, dict[str, Any]]:
+    """Return per-platform rate changes per hour, keyed by (weekday, hour) bucket.
+
+    Each platform maps to ``{"overall": float | None, "buckets": {...},
+    "hours": float}`` where ``overall`` is the provider-wide change rate used
+    for unseen buckets and ``hours`` is the span of history behind it.
+    ``max_interval`` decides which gaps count as outages.
+    """
+    max_gap = _attributable_gap(max_interval)
+    return {
+        platform: _learn(observations, max_gap=max_gap)
+        for platform, observations in _observations(history).items()
+    }
+
+
+def expected_changes(model: dict[str, Any], since: datetime, until: datetime) -> float:
+    """Integrate a platform's learned change rate over ``[since, until)``."""
+    overall = model.get("overall") or 0.0
+    buckets = model.get("buckets", {})
+    return sum(
+        buckets.get(bucket, overall) * hours
+        for bucket, hours in _hourly_spans(since, until)
+    )
+
+
+def _pressure(
+    model: dict[str, Any] | None,
+    last_reading: datetime | None,
+    attempt: dict[str, Any] | None,
+    now: datetime,
+    min_interval: timedelta,
+    max_interval: timedelta,
+    change_threshold: float,
+) -> float:
+    """Return how due a platform is; 1.0 or more means it must be scraped."""
+    attempt = attempt or {}
+    last_attempt = parse_timestamp(attempt.get("last_attempt"))
+    failures = int(attempt.get("consecutive_failures", 0))
+    known = [moment for moment in (last_reading, last_attempt) if moment is not None]
+    if not known:
+        return math.inf
+
+    elapsed = now - max(known)
+    if failures and last_attempt is not None:
+        # Failing providers back off exponentially from their last attempt.
+        return elapsed / min(max_interval, min_interval * 2**failures)
+    if elapsed < min_interval:
+        return 0.0
+    if not model or model.get("overall") is None or model["hours"] < _MIN_HISTORY_HOURS:
+        floor = max(min_interval, _THIN_HISTORY_INTERVAL)
+        return 0.0 if elapsed < floor else elapsed / (2 * floor)
+    return max(
+        elapsed / max_interval,
+        expected_changes(model, max(known), now) / change_threshold,
+    )
+
+
+def _batch(pressures: dict[str, float], batch_fraction: float) -> list[str]:
+    """Return the platforms to scrape together, or nothing if none is due.
+
+    One browser run serves every platform, so once any platform is due the
+    others that are at least ``batch_fraction`` of the way there ride along
+    instead of needing their own run shortly after.
+    """
+    if not any(pressure >= 1.0 for pressure in pressures.values()):
+        return []
+    return [
+        platform
+        for platform, pressure in pressures.items()
+        if pressure >= batch_fraction
+    ]
+
+
+def due_platforms(
+    history: Iterable[dict[str, Any]],
+    platforms: Iterable[str],
+    now: datetime,
+    attempts: dict[str, dict[str, Any]] | None = None,
+    *,
+    min_interval: timedelta = timedelta(minutes=SCRAPE_MIN_INTERVAL_MINUTES),
+    max_interval: timedelta = timedelta(minutes=SCRAPE_MAX_INTERVAL_MINUTES),
+    change_threshold: float = SCRAPE_CHANGE_THRESHOLD,
+    batch_fraction: float = SCRAPE_BATCH_FRACTION,
+) -> list[str]:
+    """Return the platforms worth scraping at ``now`` (naive Singapore time).
+
+    A platform is due once the expected number of rate changes since it was
+    last scraped reaches ``change_threshold``, bounded by the min/max
+    intervals; other platforms close to due are batched into the same run.
+    ``attempts`` holds the last attempt per platform (see
+    :mod:`app.scheduling.state`) so failing providers back off exponentially
+    rather than being retried on every tick. Providers with too little
+    history are scraped at most hourly.
+    """
+    history = list(history)
+    attempts = attempts or {}
+    observations = _observations(history)
+    models = learn_change_rates(history, max_interval=max_interval)
+    pressures: dict[str, float] = {}
+    for platform in platforms:
+        platform_observations = observations.get(platform)
+        last_reading = platform_observations[-1][0] if platform_observations else None
+        pressures[platform] = _pressure(
+            models.get(platform),
+            last_reading,
+            attempts.get(platform),
+            now,
+            min_interval,
+            max_interval,
+            change_threshold,
+        )
+    return _batch(pressures, batch_fraction)
+
+
+def _segments(slots: Sequence[datetime], max_gap: timedelta) -> list[list[datetime]]:
+    """Split recorded run times at outages, where no change times are known."""
+    segments: list[list[datetime]] = []
+    for slot in slots:
+        if segments and slot - segments[-1][-1] <= max_gap:
+            segments[-1].append(slot)
+        else:
+            segments.append([slot])
+    return segments
+
+
+def _decision_slots(slots: Sequence[datetime], interval: timedelta) -> list[datetime]:
+    """Map a cron grid onto recorded run times.
+
+    Each tick of a cron-aligned ``interval`` grid decides at the first
+    recorded run at or after it, so every schedule is measured against the
+    same readings at the data's own resolution.
+    """
+    interval_seconds = interval.total_seconds()
+    start = slots[0]
+    midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    offset = (start - midnight).total_seconds()
+    tick = midnight + timedelta(
+        seconds=math.ceil(offset / interval_seconds) * interval_seconds
+    )
+    decisions = [start]
+    while tick <= slots[-1]:
+        index = bisect_left(slots, tick)
+        if slots[index] != decisions[-1]:
+            decisions.append(slots[index])
+        tick += interval
+    return decisions
+
+
+def _empty_stats() -> dict[str, Any]:
+    return {
+        "scrapes": 0,
+        "detected_changes": 0,
+        "merged_changes": 0,
+        "missed_changes": 0,
+        "delays": [],
+    }
+
+
+def _replay_segment(
+    readings: dict[str, list[Observation]],
+    decisions: Sequence[datetime],
+    choose: Callable[[datetime, dict[str, datetime | None]], list[str]],
+    totals: dict[str, Any],
+) -> None:
+    """Run one schedule over a segment, scraping what ``choose`` picks.
+
+    Every true change (a stored reading that differs from the previous one)
+    is classified as detected (the first one, when the scraped value moved),
+    merged (further changes folded into that detection) or missed (the value
+    moved back before the next scrape, it happened before the first scrape,
+    or the segment ended first). The three counts add up to the true changes.
+    """
+    tracks = {
+        platform: {
+            "changes": [
+                current_at
+                for (_, previous_rate), (current_at, current_rate) in zip(
+                    observations, observations[1:]
+                )
+                if current_rate != previous_rate
+            ],
+            "reading_index": 0,
+            "change_index": 0,
+            "last_at": None,
+            "last_rate": None,
+        }
+        for platform, observations in readings.items()
+    }
+
+    for decision in decisions:
+        active = {
+            platform: track["last_at"]
+            for platform, track in tracks.items()
+            if readings[platform][0][0] <= decision <= readings[platform][-1][0]
+        }
+        chosen = [platform for platform in choose(decision, active) if platform in active]
+        if chosen:
+            totals["browser_runs"] += 1
+        for platform in chosen:
+            track = tracks[platform]
+            stats = totals["platforms"][platform]
+            observations = readings[platform]
+            while (
+                track["reading_index"] + 1 < len(observations)
+                and observations[track["reading_index"] + 1][0] <= decision
+            ):
+                track["reading_index"] += 1
+            rate = observations[track["reading_index"]][1]
+            changes = track["changes"]
+            pending = []
+            while (
+                track["change_index"] < len(changes)
+                and changes[track["change_index"]] <= decision
+            ):
+                pending.append(changes[track["change_index"]])
+                track["change_index"] += 1
+
+            stats["scrapes"] += 1
+            if track["last_rate"] is not None and rate != track["last_rate"]:
+                stats["detected_changes"] += 1
+                stats["merged_changes"] += len(pending) - 1
+                stats["delays"].append((decision - pending[0]).total_seconds() / 3600)
+            else:
+                stats["missed_changes"] += len(pending)
+            track["last_at"] = decision
+            track["last_rate"] = rate
+
+    for platform, track in tracks.items():
+        totals["platforms"][platform]["missed_changes"] += (
+            len(track["changes"]) - track["change_index"]
+        )
+
+
+def replay_schedule(
+    history: Iterable[dict[str, Any]],
+    *,
+    tick: timedelta = timedelta(minutes=SCRAPE_TICK_MINUTES),
+    baseline_interval: timedelta = timedelta(hours=1),
+    min_interval: timedelta = timedelta(minutes=SCRAPE_MIN_INTERVAL_MINUTES),
+    max_interval: timedelta = timedelta(minutes=SCRAPE_MAX_INTERVAL_MINUTES),
+    change_threshold: float = SCRAPE_CHANGE_THRESHOLD,
+    batch_fraction: float = SCRAPE_BATCH_FRACTION,
+) -> dict[str, Any]:
+    """Replay stored history through three schedules on the recorded runs.
+
+    Readings stamped with the same timestamp came from one browser run, so
+    the distinct timestamps are the runs that actually happened and the only
+    moments at which rates are known. ``recorded`` scrapes exactly what was
+    stored; ``fixed`` scrapes every platform once per ``baseline_interval``;
+    ``adaptive`` decides every ``tick`` with the same batched logic as
+    :func:`due_platforms`. Outages are skipped. Each schedule reports its
+    browser runs plus per-platform scrapes, detected/merged/missed changes,
+    mean detection delay, and scrapes per true change. Rates are learned
+    from the same history, so the figures are in-sample.
+    """
+    history = list(history)
+    observations = _observations(history)
+    models = learn_change_rates(history, max_interval=max_interval)
+    slots = sorted({moment for rows in observations.values() for moment, _ in rows})
+    recorded_platforms: dict[datetime, set[str]] = defaultdict(set)
+    for platform, rows in observations.items():
+        for moment, _ in rows:
+            recorded_platforms[moment].add(platform)
+
+    def recorded(now: datetime, active: dict[str, datetime | None]) -> list[str]:
+        return sorted(recorded_platforms[now])
+
+    def fixed(now: datetime, active: dict[str, datetime | None]) -> list[str]:
+        return list(active)
+
+    def adaptive(now: datetime, active: dict[str, datetime | None]) -> list[str]:
+        pressures = {
+            platform: _pressure(
+                models.get(platform),
+                last_at,
+                None,
+                now,
+                min_interval,
+                max_interval,
+                change_threshold,
+            )
+            for platform, last_at in active.items()
+        }
+        return _batch(pressures, batch_fraction)
+
+    schedules = (
+        ("recorded", recorded, None),
+        ("fixed", fixed, baseline_interval),
+        ("adaptive", adaptive, tick),
+    )
+    report: dict[str, Any] = {"slots": 0, "changes": defaultdict(int)}
+    for label, _, _ in schedules:
+        report[label] = {
+            "browser_runs": 0,
+            "platforms": defaultdict(_empty_stats),
+        }
+
+    for segment in _segments(slots, _attributable_gap(max_interval)):
+        start, end = segment[0], segment[-1]
+        readings = {}
+        for platform, rows in observations.items():
+            window = [row for row in rows if start <= row[0] <= end]
+            if window:
+                readings[platform] = window
+                report["changes"][platform] += sum(
+                    1
+                    for (_, previous_rate), (_, current_rate) in zip(window, window[1:])
+                    if current_rate != previous_rate
+                )
+        report["slots"] += len(segment)
+        for label, choose, interval in schedules:
+            decisions = segment if interval is None else _decision_slots(segment, interval)
+            _replay_segment(readings, decisions, choose, report[label])
+
+    report["changes"] = dict(report["changes"])
+    for label, _, _ in schedules:
+        platforms = dict(report[label]["platforms"])
+        for platform, stats in platforms.items():
+            delays = stats.pop("delays")
+            changes = report["changes"].get(platform, 0)
+            stats["mean_detection_delay_hours"] = (
+                sum(delays) / len(delays) if delays else None
+            )
+            stats["scrapes_per_change"] = stats["scrapes"] / changes if changes else None
+        report[label]["platforms"] = platforms
+    return report
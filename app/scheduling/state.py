@@ -0,0 +1,58 @@
+"""Local JSON state read and written by the scrape scheduler."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable
+
+
+def _load_json(path: Path, default: Any) -> Any:
+    if not path.exists():
+        return default
+    try:
+        with path.open("r", encoding="utf-8") as json_file:
+            content = json_file.read().strip()
+            return json.loads(content) if content else default
+    except json.JSONDecodeError as decode_error:
+        print(f"Warning: Could not parse {path} for scheduling: {decode_error}")
+        return default
+
+
+def load_history(path: Path) -> list[dict[str, Any]]:
+    """Return the stored rate readings, or an empty list if unavailable."""
+    return _load_json(path, [])
+
+
+def load_attempts(path: Path) -> dict[str, dict[str, Any]]:
+    """Return the last scrape attempt per platform, keyed by platform."""
+    return _load_json(path, {})
+
+
+def record_attempts(
+    path: Path,
+    attempted: Iterable[str],
+    succeeded: Iterable[str],
+    moment: datetime,
+) -> dict[str, dict[str, Any]]:
+    """Store an attempt for each platform in ``attempted``, failed or not.
+
+    Successful platforms reset ``consecutive_failures``; the others increment
+    it so the scheduler can back off from providers that keep failing.
+    """
+    attempts = load_attempts(path)
+    succeeded = set(succeeded)
+    for platform in attempted:
+        previous = attempts.get(platform, {})
+        attempts[platform] = {
+            "last_attempt": moment.isoformat(),
+            "consecutive_failures": (
+                0
+                if platform in succeeded
+                else int(previous.get("consecutive_failures", 0)) + 1
+            ),
+        }
+    with path.open("w", encoding="utf-8") as json_file:
+        json.dump(attempts, json_file, indent=4, sort_keys=True)
+    return attempts
@@ -1,5 +1,5 @@
 """Scraper utilities for collecting exchange rates."""
 
-from .rates_scraper import collect_rates
+from .rates_scraper import PLATFORMS, collect_rates
 
-__all__ = ["collect_rates"]
+__all__ = ["PLATFORMS", "collect_rates"]
@@ -5,7 +5,7 @@ from __future__ import annotations
 import os
 import re
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from playwright.sync_api import Browser, BrowserContext, Page, sync_playwright
@@ -324,8 +324,28 @@ def _scrape_western_union(
             context.close()
 
 
-def collect_rates() -> List[Dict[str, str]]:
-    """Collect exchange rates from the supported providers."""
+_SCRAPERS = {
+    "CIMB": _scrape_cimb,
+    "WISE": _scrape_wise,
+    "WESTERNUNION": _scrape_western_union,
+}
+
+PLATFORMS = tuple(_SCRAPERS)
+
+
+def collect_rates(platforms: Optional[Iterable[str]] = None) -> List[Dict[str, str]]:
+    """Collect exchange rates from the supported providers.
+
+    ``platforms`` limits the run to a subset of ``PLATFORMS``; when it is empty
+    the browser is not launched at all.
+    """
+    selected = PLATFORMS if platforms is None else tuple(platforms)
+    unknown = [platform for platform in selected if platform not in _SCRAPERS]
+    if unknown:
+        raise ValueError(f"Unsupported platforms: {', '.join(unknown)}")
+    if not selected:
+        return []
+
     playwright = None
     browser = None
     try:
@@ -333,9 +353,8 @@ def collect_rates() -> List[Dict[str, str]]:
         rates: List[Dict[str, str]] = []
         timestamp = datetime.utcnow() + timedelta(hours=8)
 
-        _scrape_cimb(browser, timestamp, rates)
-        _scrape_wise(browser, timestamp, rates)
-        _scrape_western_union(browser, timestamp, rates)
+        for platform in selected:
+            _SCRAPERS[platform](browser, timestamp, rates)
 
         return rates
     finally:
@@ -14,3 +14,18 @@ SUPABASE_TABLE: str = os.getenv("SUPABASE_TABLE", "exchange_rates")
 
 BASE_CURRENCY: str = os.getenv("BASE_CURRENCY", "SGD")
 TARGET_CURRENCY: str = os.getenv("TARGET_CURRENCY", "MYR")
+
+SCRAPE_PLATFORMS: tuple[str, ...] = tuple(
+    platform.strip().upper()
+    for platform in os.getenv("SCRAPE_PLATFORMS", "CIMB,WISE,WESTERNUNION").split(",")
+    if platform.strip()
+)
+# Must match the cron interval in .github/workflows/update_exchange_rates.yml.
+SCRAPE_TICK_MINUTES: int = int(os.getenv("SCRAPE_TICK_MINUTES", "30"))
+SCRAPE_MIN_INTERVAL_MINUTES: int = int(os.getenv("SCRAPE_MIN_INTERVAL_MINUTES", "30"))
+SCRAPE_MAX_INTERVAL_MINUTES: int = int(os.getenv("SCRAPE_MAX_INTERVAL_MINUTES", "360"))
+SCRAPE_CHANGE_THRESHOLD: float = float(os.getenv("SCRAPE_CHANGE_THRESHOLD", "2.0"))
+SCRAPE_BATCH_FRACTION: float = float(os.getenv("SCRAPE_BATCH_FRACTION", "0.5"))
+SCRAPE_HISTORY_HALF_LIFE_DAYS: float = float(
+    os.getenv("SCRAPE_HISTORY_HALF_LIFE_DAYS", "30")
+)
@@ -0,0 +1,94 @@
+"""CLI script to decide which providers the adaptive schedule wants scraped.
+
+Only needs python-dotenv and Flask, so CI can run it before installing
+Playwright and skip the expensive steps when nothing is due.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from app.scheduling import (
+    due_platforms,
+    load_attempts,
+    load_history,
+    replay_schedule,
+)
+from config import SCRAPE_PLATFORMS, SCRAPE_TICK_MINUTES
+
+EXCHANGE_RATES_FILE = Path("exchange_rates.json")
+SCRAPE_ATTEMPTS_FILE = Path("scrape_attempts.json")
+
+
+def _format_metric(value: float | None) -> str:
+    return "n/a" if value is None else f"{value:.2f}"
+
+
+def _print_report(history: list[dict[str, Any]]) -> None:
+    report = replay_schedule(history)
+    print(
+        f"Replay over {report['slots']} recorded runs: what was stored, a fixed "
+        f"hourly schedule, and the adaptive schedule on a {SCRAPE_TICK_MINUTES}-minute "
+        "tick (scrapes per change use the true change count for all three)"
+    )
+    for label in ("recorded", "fixed", "adaptive"):
+        schedule = report[label]
+        print(f"\n{label}: {schedule['browser_runs']} browser runs")
+        for platform, stats in sorted(schedule["platforms"].items()):
+            print(
+                f"  {platform}: {stats['scrapes']} scrapes, "
+                f"{_format_metric(stats['scrapes_per_change'])} scrapes/change "
+                f"({report['changes'].get(platform, 0)} changes: "
+                f"{stats['detected_changes']} detected, "
+                f"{stats['merged_changes']} merged, "
+                f"{stats['missed_changes']} missed), "
+                f"mean detection delay "
+                f"{_format_metric(stats['mean_detection_delay_hours'])} h"
+            )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Report every provider as due regardless of the adaptive schedule.",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Print the scrapes-per-change replay report from stored history and exit.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    history = load_history(EXCHANGE_RATES_FILE)
+
+    if args.report:
+        _print_report(history)
+        return
+
+    if args.force:
+        platforms = list(SCRAPE_PLATFORMS)
+    else:
+        now = datetime.utcnow() + timedelta(hours=8)
+        platforms = due_platforms(
+            history, SCRAPE_PLATFORMS, now, load_attempts(SCRAPE_ATTEMPTS_FILE)
+        )
+
+    print(f"Providers due: {', '.join(platforms) if platforms else 'none'}")
+
+    github_output = os.getenv("GITHUB_OUTPUT")
+    if github_output:
+        with open(github_output, "a", encoding="utf-8") as output_file:
+            output_file.write(f"platforms={','.join(platforms)}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,27 @@
 
 from __future__ import annotations
 
+import argparse
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
+from app.scheduling import (
+    due_platforms,
+    load_attempts,
+    load_history,
+    record_attempts,
+)
 from app.scrapers import collect_rates
 from app.services import insert_rates
 from app.services.supabase_client import (
     SupabaseConfigurationError,
     supabase_configured,
 )
+from config import SCRAPE_PLATFORMS
 
 EXCHANGE_RATES_FILE = Path("exchange_rates.json")
+SCRAPE_ATTEMPTS_FILE = Path("scrape_attempts.json")
 
 
 def _persist_locally(rates: list[dict[str, str]]) -> None:
@@ -41,8 +50,57 @@ def _persist_locally(rates: list[dict[str, str]]) -> None:
     print("\nExchange rates appended to exchange_rates.json")
 
 
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--force",
+        action="store_true",
+        help="Scrape every provider regardless of the adaptive schedule.",
+    )
+    group.add_argument(
+        "--platforms",
+        help="Comma-separated providers to scrape, e.g. as chosen by check_due.py.",
+    )
+    return parser.parse_args()
+
+
 def main() -> None:
-    rates = collect_rates()
+    args = _parse_args()
+    now = datetime.utcnow() + timedelta(hours=8)
+
+    if args.force:
+        platforms = list(SCRAPE_PLATFORMS)
+    elif args.platforms is not None:
+        platforms = [
+            platform.strip().upper()
+            for platform in args.platforms.split(",")
+            if platform.strip()
+        ]
+    else:
+        platforms = due_platforms(
+            load_history(EXCHANGE_RATES_FILE),
+            SCRAPE_PLATFORMS,
+            now,
+            load_attempts(SCRAPE_ATTEMPTS_FILE),
+        )
+
+    if not platforms:
+        print("No providers due for scraping; nothing to do.")
+        return
+
+    rates: list[dict[str, str]] = []
+    try:
+        rates = collect_rates(platforms)
+    finally:
+        # Failures count as attempts too, so failing providers back off.
+        record_attempts(
+            SCRAPE_ATTEMPTS_FILE,
+            platforms,
+            {rate["platform"] for rate in rates},
+            now,
+        )
+
     if not rates:
         print("No rates collected; nothing to persist.")
         return
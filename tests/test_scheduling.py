@@ -0,0 +1,225 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.scheduling import due_platforms, expected_changes, record_attempts, replay_schedule
+from app.scheduling.scheduler import _batch, _learn, _pressure
+
+MONDAY = datetime(2024, 1, 1)  # 2024-01-01 is a Monday
+MINUTE = timedelta(minutes=1)
+HOUR = timedelta(hours=1)
+
+
+def _rows(platform, readings):
+    return [
+        {"platform": platform, "timestamp": moment.isoformat(), "exchange_rate": rate}
+        for moment, rate in readings
+    ]
+
+
+def _model(buckets, overall=0.0, hours=100.0):
+    return {"overall": overall, "buckets": buckets, "hours": hours}
+
+
+def test_learn_recovers_poisson_rate_without_prior():
+    # One changed and one unchanged hour in the same bucket: the MLE is ln 2.
+    observations = [
+        (MONDAY + 10 * HOUR, "1"),
+        (MONDAY + 11 * HOUR, "2"),
+        (MONDAY + timedelta(days=7, hours=10), "2"),
+        (MONDAY + timedelta(days=7, hours=11), "2"),
+    ]
+
+    model = _learn(observations, max_gap=12 * HOUR, prior_weight_hours=0.0, half_life_days=0)
+
+    assert model["hours"] == pytest.approx(2.0)
+    assert set(model["buckets"]) == {(0, 10)}
+    assert model["buckets"][(0, 10)] == pytest.approx(math.log(2), abs=1e-3)
+
+
+def test_learn_shrinks_sparse_buckets_towards_overall_rate():
+    observations = [
+        (MONDAY + 9 * HOUR, "1"),
+        (MONDAY + 10 * HOUR, "2"),
+        (MONDAY + 11 * HOUR, "2"),
+    ]
+
+    sparse = _learn(observations, max_gap=12 * HOUR, prior_weight_hours=0.0, half_life_days=0)
+    smoothed = _learn(observations, max_gap=12 * HOUR, prior_weight_hours=4.0, half_life_days=0)
+
+    assert sparse["buckets"][(0, 10)] == 0.0
+    assert 0.0 < smoothed["buckets"][(0, 10)] < smoothed["overall"]
+    assert smoothed["buckets"][(0, 9)] > smoothed["overall"]
+
+
+def test_learn_spreads_long_gaps_and_skips_outages():
+    observations = [
+        (MONDAY, "1"),
+        (MONDAY + 4 * HOUR, "1"),
+        (MONDAY + timedelta(days=30), "2"),
+    ]
+
+    model = _learn(observations, max_gap=12 * HOUR, prior_weight_hours=0.0, half_life_days=0)
+
+    assert model["hours"] == pytest.approx(4.0)
+    assert set(model["buckets"]) == {(0, 0), (0, 1), (0, 2), (0, 3)}
+
+
+def test_expected_changes_splits_span_at_hour_boundary():
+    model = _model({(0, 10): 1.0, (0, 11): 3.0})
+
+    since = MONDAY + 10 * HOUR + 45 * MINUTE
+    until = MONDAY + 11 * HOUR + 15 * MINUTE
+
+    assert expected_changes(model, since, until) == pytest.approx(0.25 + 0.75)
+
+
+def test_expected_changes_falls_back_to_overall_rate():
+    model = _model({}, overall=2.0)
+
+    assert expected_changes(model, MONDAY, MONDAY + 90 * MINUTE) == pytest.approx(3.0)
+
+
+def test_learn_uses_max_gap_to_detect_outages():
+    observations = [(MONDAY, "1"), (MONDAY + 2 * HOUR, "2")]
+
+    assert _learn(observations, max_gap=HOUR)["overall"] is None
+    assert _learn(observations, max_gap=2 * HOUR)["hours"] == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize(
+    ("elapsed", "rate", "due"),
+    [
+        (14 * MINUTE, 100.0, False),  # below the minimum interval
+        (15 * MINUTE, 100.0, True),  # at the minimum interval
+        (59 * MINUTE, 0.0, False),  # static provider before the maximum
+        (60 * MINUTE, 0.0, True),  # at the maximum interval
+        (30 * MINUTE, 1.0, True),  # exactly reaches the threshold
+        (29 * MINUTE, 1.0, False),  # just short of the threshold
+    ],
+)
+def test_pressure_respects_interval_and_threshold_edges(elapsed, rate, due):
+    model = _model({}, overall=rate)
+    last = MONDAY + 10 * HOUR
+
+    pressure = _pressure(model, last, None, last + elapsed, 15 * MINUTE, HOUR, 0.5)
+
+    assert (pressure >= 1.0) is due
+
+
+def test_pressure_samples_thin_history_no_faster_than_hourly():
+    model = _model({}, overall=5.0, hours=1.0)
+
+    def pressure(elapsed):
+        return _pressure(model, MONDAY, None, MONDAY + elapsed, 15 * MINUTE, 6 * HOUR, 0.5)
+
+    assert pressure(59 * MINUTE) == 0.0
+    assert pressure(HOUR) == pytest.approx(0.5)  # may ride along with other runs
+    assert pressure(2 * HOUR) == pytest.approx(1.0)  # forces a run of its own
+
+
+def test_pressure_backs_off_failing_providers():
+    attempt = {"last_attempt": MONDAY.isoformat(), "consecutive_failures": 2}
+
+    def pressure(elapsed):
+        return _pressure(None, None, attempt, MONDAY + elapsed, 15 * MINUTE, HOUR, 0.5)
+
+    assert pressure(59 * MINUTE) < 1.0
+    assert pressure(60 * MINUTE) == pytest.approx(1.0)
+
+    attempt["consecutive_failures"] = 10
+    assert pressure(60 * MINUTE) == pytest.approx(1.0)
+
+
+def test_batch_adds_nearly_due_platforms_to_a_due_run():
+    assert _batch({"CIMB": 1.2, "WISE": 0.6, "WESTERNUNION": 0.2}, 0.5) == [
+        "CIMB",
+        "WISE",
+    ]
+    assert _batch({"CIMB": 0.9, "WISE": 0.6}, 0.5) == []
+
+
+def test_due_platforms_uses_recorded_attempts(tmp_path):
+    history = _rows("WESTERNUNION", [(MONDAY, "3.2")])
+    now = MONDAY + timedelta(days=1)
+    attempts_file = tmp_path / "scrape_attempts.json"
+    intervals = {"min_interval": 15 * MINUTE, "max_interval": HOUR}
+
+    assert due_platforms(history, ["WESTERNUNION"], now, **intervals) == ["WESTERNUNION"]
+
+    attempts = record_attempts(attempts_file, ["WESTERNUNION"], [], now)
+    assert attempts["WESTERNUNION"]["consecutive_failures"] == 1
+    assert due_platforms(
+        history, ["WESTERNUNION"], now + 15 * MINUTE, attempts, **intervals
+    ) == []
+    assert due_platforms(
+        history, ["WESTERNUNION"], now + 30 * MINUTE, attempts, **intervals
+    ) == ["WESTERNUNION"]
+
+    attempts = record_attempts(attempts_file, ["WESTERNUNION"], ["WESTERNUNION"], now)
+    assert attempts["WESTERNUNION"]["consecutive_failures"] == 0
+
+
+def test_replay_schedule_counts_browser_runs_and_classifies_changes():
+    rates = ["1", "1", "2", "3", "3", "4", "3", "3", "3", "5", "5", "5", "5"]
+    slots = [MONDAY + index * 15 * MINUTE for index in range(len(rates))]
+    history = _rows("CIMB", zip(slots, rates)) + _rows("WISE", [(slot, "9") for slot in slots])
+
+    report = replay_schedule(
+        history,
+        tick=15 * MINUTE,
+        baseline_interval=HOUR,
+        min_interval=15 * MINUTE,
+        max_interval=6 * HOUR,
+    )
+
+    assert report["slots"] == 13
+    assert report["changes"] == {"CIMB": 5, "WISE": 0}
+
+    recorded = report["recorded"]
+    assert recorded["browser_runs"] == 13
+    assert recorded["platforms"]["CIMB"]["detected_changes"] == 5
+    assert recorded["platforms"]["CIMB"]["mean_detection_delay_hours"] == 0.0
+
+    # Hourly: 00:00, 01:00, 02:00 and 03:00, both providers in one run.
+    fixed = report["fixed"]
+    assert fixed["browser_runs"] == 4
+    assert fixed["platforms"]["WISE"]["scrapes"] == 4
+    assert fixed["platforms"]["CIMB"] == {
+        "scrapes": 4,
+        "detected_changes": 2,
+        "merged_changes": 1,
+        "missed_changes": 2,
+        "mean_detection_delay_hours": pytest.approx((0.5 + 0.75) / 2),
+        "scrapes_per_change": pytest.approx(4 / 5),
+    }
+
+    # Three hours of history is too thin to trust, so both providers are
+    # scraped together at 00:00 and again once two hours have passed.
+    adaptive = report["adaptive"]
+    assert adaptive["browser_runs"] == 2
+    assert adaptive["platforms"]["WISE"]["scrapes"] == 2
+    assert adaptive["platforms"]["CIMB"] == {
+        "scrapes": 2,
+        "detected_changes": 1,
+        "merged_changes": 3,
+        "missed_changes": 1,
+        "mean_detection_delay_hours": pytest.approx(1.5),
+        "scrapes_per_change": pytest.approx(2 / 5),
+    }
+
+
+def test_replay_schedule_splits_outages_by_max_interval():
+    history = _rows(
+        "CIMB",
+        [
+            (MONDAY, "1"),
+            (MONDAY + 15 * MINUTE, "1"),
+            (MONDAY + 2 * HOUR, "2"),
+            (MONDAY + 2 * HOUR + 15 * MINUTE, "2"),
+        ],
+    )
+
+    assert replay_schedule(history, max_interval=6 * HOUR)["changes"] == {"CIMB": 1}
+    assert replay_schedule(history, max_interval=15 * MINUTE)["changes"] == {"CIMB": 0}